@@ -1,15 +1,27 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import time
 import re
+import io
+import json
+import hashlib
+import hmac
+import mimetypes
+import threading
+import queue
+import os
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, Any
-from dataclasses import dataclass
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+try:
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:  # streamlit < 1.38
+    from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
 
 # Configurações de estilo Apple
 APPLE_COLORS = {
@@ -21,10 +33,41 @@ APPLE_COLORS = {
     "text": "#1D1D1F"
 }
 
-def apply_apple_design():
-    """Aplica o design estilo Apple"""
-    st.markdown(
-        f"""
+# Expressões regulares pré-compiladas
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Tempo limite (segundos) das chamadas às APIs do Google
+HTTP_TIMEOUT = 10
+
+# Escopos OAuth da conta de serviço: escrita na planilha e upload/exportação no Drive
+GOOGLE_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# Número máximo de opções exibidas na busca de participantes
+SEARCH_RESULTS_LIMIT = 50
+
+# Tamanho mínimo do termo para disparar a busca
+SEARCH_MIN_LENGTH = 2
+
+# Linhas por página na tabela do Painel de Administração
+ADMIN_PAGE_SIZE = 50
+
+# Espelho local da planilha (um arquivo por versão da planilha)
+MIRROR_DIR = Path("cache")
+
+# Intervalo (segundos) entre consultas à data de modificação da planilha
+VERSION_CHECK_TTL = 15
+
+# Limites de upload
+MAX_FILE_SIZE = 2 * 1024 * 1024
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+
+@st.cache_resource(show_spinner=False)
+def _apple_css() -> str:
+    """Bloco <style> do design estilo Apple, formatado uma única vez por processo"""
+    return f"""
         <style>
             body {{
                 background-color: {APPLE_COLORS['background']};
@@ -54,65 +97,271 @@ def apply_apple_design():
                 margin-top: 10px;
             }}
         </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
 
-@dataclass
+def apply_apple_design():
+    """Aplica o design estilo Apple"""
+    st.markdown(_apple_css(), unsafe_allow_html=True)
+
+def _credentials_id(credentials: Dict[str, Any]) -> str:
+    """Impressão digital estável das credenciais (usada como chave de cache)"""
+    payload = json.dumps(dict(credentials), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+@dataclass(frozen=True, slots=True)
 class GoogleConfig:
     """Configuração para integração com Google APIs"""
     sheet_id: str
     folder_id: str
     credentials: Dict[str, Any]
+    credentials_id: str = field(init=False)
+
+    def __post_init__(self):
+        # Calculada uma vez junto com a configuração, não a cada acesso aos clientes
+        object.__setattr__(self, "credentials_id", _credentials_id(self.credentials))
+
+@st.cache_resource(show_spinner=False)
+def _service_account_credentials(creds_id: str, _credentials: Dict[str, Any]):
+    """Credenciais da conta de serviço criadas uma vez por conta, não por API"""
+    from google.oauth2 import service_account
+
+    # Leitura da chave RSA feita uma única vez e compartilhada por Sheets e Drive
+    return service_account.Credentials.from_service_account_info(
+        _credentials, scopes=GOOGLE_SCOPES
+    )
+
+class _HttpPool:
+    """Transportes HTTP autenticados reaproveitados por todo o processo.
+
+    httplib2.Http não é thread-safe: cada chamada a request() retira um
+    transporte livre (ou cria um novo) e o devolve ao terminar, de modo que
+    nenhum deles é usado por duas threads ao mesmo tempo.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        # LIFO: reutiliza primeiro o transporte usado mais recentemente, cuja
+        # conexão TLS tem mais chance de ainda estar aberta
+        self._idle = queue.LifoQueue()
+
+    def request(self, *args, **kwargs):
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            http = self._factory()
+        response = http.request(*args, **kwargs)
+        # Só volta ao pool após sucesso: um transporte que falhou é descartado
+        self._idle.put(http)
+        return response
+
+@st.cache_resource(show_spinner=False)
+def _build_service(api: str, version: str, creds_id: str, _credentials: Dict[str, Any]):
+    """Constrói o cliente de uma API do Google uma única vez por processo"""
+    # Importações pesadas adiadas: só pagas quando um cliente é realmente necessário
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+    from googleapiclient.http import HttpRequest
+
+    creds = _service_account_credentials(creds_id, _credentials)
+    # O cliente é compartilhado por todas as sessões e threads; as requisições saem
+    # por um pool do processo, então conexões TLS abertas sobrevivem aos reruns
+    # (cada rerun do Streamlit roda em uma thread nova)
+    pool = _HttpPool(lambda: AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT)))
+
+    def build_request(_http, *args, **kwargs):
+        return HttpRequest(pool, *args, **kwargs)
+
+    # Documento de descoberta empacotado na biblioteca: sem requisição HTTP no build()
+    return build(
+        api, version,
+        credentials=creds,
+        requestBuilder=build_request,
+        static_discovery=True,
+        cache_discovery=False
+    )
+
+def get_sheets_service(config: GoogleConfig):
+    """Cliente do Google Sheets compartilhado por todas as sessões"""
+    return _build_service('sheets', 'v4', config.credentials_id, config.credentials)
+
+def get_drive_service(config: GoogleConfig):
+    """Cliente do Google Drive compartilhado por todas as sessões"""
+    return _build_service('drive', 'v3', config.credentials_id, config.credentials)
 
 class GoogleServices:
     """Gerencia conexões com APIs do Google"""
-    _instances = {}
+    def __init__(self, config: GoogleConfig):
+        self.config = config
+
+    # Os clientes vêm do cache de recursos (nunca devem ser modificados) e só
+    # são construídos no primeiro acesso, p. ex. quando o espelho local expira
+    @property
+    def sheets(self):
+        """Cliente da API do Google Sheets"""
+        return get_sheets_service(self.config)
 
-    def __new__(cls, config: GoogleConfig):
-        if cls not in cls._instances:
-            instance = super().__new__(cls)
-            creds = service_account.Credentials.from_service_account_info(config.credentials)
-            instance.sheets = build('sheets', 'v4', credentials=creds)
-            instance.drive = build('drive', 'v3', credentials=creds)
-            cls._instances[cls] = instance
-        return cls._instances[cls]
+    @property
+    def drive(self):
+        """Cliente da API do Google Drive"""
+        return get_drive_service(self.config)
+
+@st.cache_resource(show_spinner=False)
+def get_services(creds_id: str, _config: GoogleConfig) -> GoogleServices:
+    """GoogleServices compartilhado no processo para cada conjunto de credenciais"""
+    return GoogleServices(_config)
 
 class DataManager:
     """Gerencia operações de dados com Google Sheets"""
     def __init__(self, config: GoogleConfig):
         self.config = config
-        self.service = GoogleServices(config)
+        self.service = get_services(config.credentials_id, config)
 
-    @st.cache_data(ttl=300, show_spinner="Carregando dados...")
-    def load_data(_self, sheet_id: str) -> pd.DataFrame:
-        """Carrega dados da planilha Google"""
+    @st.cache_data(ttl=VERSION_CHECK_TTL, show_spinner=False)
+    def sheet_version(_self, sheet_id: str) -> str:
+        """Data da última modificação da planilha, usada para validar o cache"""
         try:
-            result = _self.service.sheets.spreadsheets().values().get(
-                spreadsheetId=sheet_id,
-                range="A:D"
-            ).execute()
-            values = result.get('values', [])
-            if not values:
-                return pd.DataFrame(columns=["Nome", "Celular", "Tipo", "Status"])
-            df = pd.DataFrame(values[1:], columns=values[0])
-            df["Celular"] = df["Celular"].apply(lambda x: re.sub(r'\D', '', x))
-            return df
-        except Exception as e:
+            return _self.service.drive.files().get(
+                fileId=sheet_id,
+                fields="modifiedTime"
+            ).execute()["modifiedTime"]
+        except Exception:
+            return ""
+
+    def load_latest(self) -> pd.DataFrame:
+        """Carrega a versão atual da planilha configurada"""
+        sheet_id = self.config.sheet_id
+        version = self.sheet_version(sheet_id)
+        # Falhas saem das funções cacheadas como exceção: o erro não fica em cache
+        try:
+            if not version:
+                return self.load_unversioned(sheet_id)
+            return self.load_data(sheet_id, version)
+        except Exception:
             st.error("Erro ao carregar dados. Tente novamente.")
             return pd.DataFrame(columns=["Nome", "Celular", "Tipo", "Status"])
 
-    def save_data(self, df: pd.DataFrame) -> bool:
-        """Salva dados na planilha Google"""
+    # cache_resource devolve o mesmo objeto sem pickle a cada rerun: quem for
+    # alterar o DataFrame deve trabalhar sobre uma cópia
+    @st.cache_resource(ttl=3600, max_entries=4, show_spinner="Carregando dados...")
+    def load_data(_self, sheet_id: str, version: str) -> pd.DataFrame:
+        """Carrega dados da planilha Google na versão indicada"""
+        mirror = _self._read_mirror(version)
+        if mirror is not None:
+            return mirror
+        return _self._fetch_sheet(sheet_id, version)
+
+    @st.cache_resource(ttl=VERSION_CHECK_TTL, max_entries=1, show_spinner="Carregando dados...")
+    def load_unversioned(_self, sheet_id: str) -> pd.DataFrame:
+        """Carrega a planilha quando a versão não pôde ser consultada no Drive.
+
+        Sem versão não há como saber quando os dados mudam: o cache dura só
+        até a próxima consulta de versão e o espelho local não é gravado.
+        """
+        return _self._fetch_sheet(sheet_id, "")
+
+    def _fetch_sheet(self, sheet_id: str, version: str) -> pd.DataFrame:
+        """Baixa a planilha do Google e atualiza o espelho local"""
+        # Exporta a primeira aba como CSV e usa o parser em C do pandas
+        content = self.service.drive.files().export_media(
+            fileId=sheet_id,
+            mimeType="text/csv"
+        ).execute()
+        if not content.strip():
+            return pd.DataFrame(columns=["Nome", "Celular", "Tipo", "Status"])
+        # Colunas de texto em Arrow: operações .str rodam nos kernels em C++
+        # e o espelho em parquet é lido sem converter objeto a objeto
+        df = pd.read_csv(
+            io.BytesIO(content), dtype="string[pyarrow]", keep_default_na=False
+        ).iloc[:, :4]
+        # Cadastros novos já são gravados só com dígitos; a limpeza vetorizada
+        # cobre apenas linhas antigas ou editadas à mão na planilha. O padrão vai
+        # como texto: um re.Pattern faria o pandas sair do kernel do Arrow
+        df["Celular"] = df["Celular"].str.replace(_NON_DIGIT_RE.pattern, '', regex=True)
+        # Marca a carga para invalidar índices derivados mantidos na sessão
+        df.attrs["loaded_at"] = time.time()
+        self._write_mirror(df, version)
+        return df
+
+    def _invalidate(self):
+        """Descarta dados e versão em cache após uma escrita na planilha"""
+        DataManager.load_data.clear()
+        DataManager.load_unversioned.clear()
+        DataManager.sheet_version.clear()
+        # O Drive pode demorar a avançar o modifiedTime: sem o espelho, a próxima
+        # carga baixa a planilha mesmo que a versão consultada ainda seja a antiga
+        for mirror_file in MIRROR_DIR.glob("attendance-*.parquet"):
+            mirror_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _mirror_path(version: str) -> Path:
+        """Arquivo do espelho local correspondente a uma versão da planilha"""
+        return MIRROR_DIR / f"attendance-{hashlib.sha1(version.encode()).hexdigest()[:16]}.parquet"
+
+    def _read_mirror(self, version: str) -> Optional[pd.DataFrame]:
+        """Lê o espelho local da planilha, se existir para a versão indicada"""
+        if not version:
+            return None
+        mirror_file = self._mirror_path(version)
+        try:
+            df = pd.read_parquet(mirror_file)
+            df.attrs["loaded_at"] = mirror_file.stat().st_mtime
+            return df
+        except Exception:
+            return None
+
+    def _write_mirror(self, df: pd.DataFrame, version: str):
+        """Grava o espelho local da planilha de forma atômica.
+
+        Só recebe dados baixados do Google na própria versão indicada. Escritas
+        do app apagam o espelho (_invalidate), então a próxima carga baixa a
+        planilha inteira, incluindo o que outras sessões gravaram.
+        """
+        if not version:
+            return
+        mirror_file = self._mirror_path(version)
+        tmp_file = mirror_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            # cache/ fica fora do git: em um checkout novo ele ainda não existe
+            MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(tmp_file, index=False)
+            os.replace(tmp_file, mirror_file)
+            # Versões anteriores do espelho não serão mais lidas
+            for old_file in MIRROR_DIR.glob("attendance-*.parquet"):
+                if old_file != mirror_file:
+                    old_file.unlink(missing_ok=True)
+        except Exception:
+            # O espelho é apenas um cache: falhas não devem afetar o fluxo principal.
+            # O temporário não casa com o glob de limpeza e sobraria em cache/
+            tmp_file.unlink(missing_ok=True)
+            mirror_file.unlink(missing_ok=True)
+
+    def append_row(self, row: list) -> bool:
+        """Acrescenta uma única linha ao final da planilha"""
+        try:
+            self.service.sheets.spreadsheets().values().append(
+                spreadsheetId=self.config.sheet_id,
+                range="A:D",
+                valueInputOption="RAW",
+                insertDataOption="INSERT_ROWS",
+                body={'values': [row]}
+            ).execute()
+            self._invalidate()
+            return True
+        except Exception as e:
+            st.error(f"Erro ao salvar dados: {str(e)}")
+            return False
+
+    def update_status(self, row_index: int, status: str) -> bool:
+        """Atualiza somente a célula de status de uma linha da planilha"""
         try:
-            values = [df.columns.tolist()] + df.values.tolist()
             self.service.sheets.spreadsheets().values().update(
                 spreadsheetId=self.config.sheet_id,
-                range="A1",
-                valueInputOption="USER_ENTERED",
-                body={'values': values}
+                # +2: linhas da planilha começam em 1 e a primeira é o cabeçalho
+                range=f"D{row_index + 2}",
+                valueInputOption="RAW",
+                body={'values': [[status]]}
             ).execute()
-            st.cache_data.clear()
+            self._invalidate()
             return True
         except Exception as e:
             st.error(f"Erro ao salvar dados: {str(e)}")
@@ -122,50 +371,181 @@ class FileHandler:
     """Gerencia upload de arquivos para o Google Drive"""
     def __init__(self, config: GoogleConfig):
         self.config = config
-        self.service = GoogleServices(config)
-        self.upload_dir = Path("uploads")
-        self.upload_dir.mkdir(exist_ok=True)
+        self.service = get_services(config.credentials_id, config)
 
     def upload_file(self, uploaded_file, name: str) -> Optional[str]:
         """Processa e faz upload do arquivo"""
-        if uploaded_file.size > 2 * 1024 * 1024:
+        if uploaded_file.size > MAX_FILE_SIZE:
             st.error("Arquivo excede 2MB. Por favor, envie um arquivo menor.")
             return None
+        content = uploaded_file.getvalue()
+        # Reenvio do mesmo comprovante para o mesmo participante na sessão:
+        # reaproveita o upload anterior (outro participante gera novo upload)
+        upload_key = (hashlib.sha256(content).hexdigest(), name)
+        uploaded_hashes = st.session_state.setdefault("uploaded_hashes", {})
+        if upload_key in uploaded_hashes:
+            return uploaded_hashes[upload_key]
+        from googleapiclient.http import MediaInMemoryUpload
+
         try:
             timestamp = datetime.now().strftime("%d%m%Y_%H%M%S")
             file_ext = Path(uploaded_file.name).suffix
             filename = f"{timestamp}_{name}{file_ext}"
-            file_path = self.upload_dir / filename
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
             file_metadata = {
                 'name': filename,
                 'parents': [self.config.folder_id]
             }
-            media = MediaFileUpload(file_path)
+            # Envia direto da memória, sem gravar o arquivo em disco
+            media = MediaInMemoryUpload(
+                content,
+                mimetype=(
+                    uploaded_file.type
+                    or mimetypes.guess_type(uploaded_file.name)[0]
+                    or "application/octet-stream"
+                ),
+                # Upload em requisição única; envio em partes só compensa para arquivos grandes
+                resumable=uploaded_file.size > RESUMABLE_UPLOAD_THRESHOLD
+            )
             self.service.drive.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id'
             ).execute()
+            uploaded_hashes[upload_key] = filename
             return filename
         except Exception as e:
             st.error(f"Erro no upload: {str(e)}")
             return None
 
+def normalize_name(name: str) -> str:
+    """Forma canônica de um nome para busca e checagem de duplicidade"""
+    # casefold é a comparação sem distinção de maiúsculas correta para Unicode
+    return name.strip().casefold()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _normalized_names(data_token: tuple, _names: list):
+    """Nomes normalizados (normalize_name), calculados uma vez por versão dos dados.
+
+    Retorna o array (para busca) e um frozenset (para checagem de duplicidade).
+    """
+    normalized = [normalize_name(str(n)) for n in _names]
+    return np.array(normalized, dtype=str), frozenset(normalized)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _prefix_index(data_token: tuple, _names_lc: np.ndarray):
+    """Nomes normalizados em ordem alfabética e suas posições originais"""
+    order = np.argsort(_names_lc, kind="stable")
+    return _names_lc[order], order
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _search_names(data_token: tuple, query: str, _names_lc: np.ndarray) -> np.ndarray:
+    """Posições dos nomes que contêm o termo buscado, cacheadas por versão dos dados.
+
+    Nomes que começam com o termo vêm primeiro (busca binária no índice
+    ordenado); só quando eles não bastam para SEARCH_RESULTS_LIMIT é que
+    os demais nomes são varridos em busca do termo no meio do texto.
+    """
+    sorted_names, order = _prefix_index(data_token, _names_lc)
+    upper = query[:-1] + chr(ord(query[-1]) + 1)
+    lo, hi = np.searchsorted(sorted_names, [query, upper])
+    prefix_hits = order[lo:hi]
+    if len(prefix_hits) >= SEARCH_RESULTS_LIMIT:
+        return prefix_hits[:SEARCH_RESULTS_LIMIT]
+    contains = np.char.find(_names_lc, query) >= 0
+    contains[prefix_hits] = False
+    hits = np.concatenate([prefix_hits, np.flatnonzero(contains)])
+    return hits[:SEARCH_RESULTS_LIMIT]
+
+def _with_script_ctx(func):
+    """Envolve func para rodar em outra thread mantendo o contexto do Streamlit"""
+    ctx = get_script_run_ctx()
+
+    def target(*args):
+        thread = threading.current_thread()
+        add_script_run_ctx(thread, ctx)
+        try:
+            return func(*args)
+        finally:
+            # Não deixa o contexto da sessão preso à thread após a tarefa.
+            # add_script_run_ctx(thread, None) recolocaria o contexto atual da thread
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+    return target
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_status_chart(status_counts: tuple):
+    """Gráfico de registros por status, reconstruído só quando as contagens mudam"""
+    counts_df = pd.DataFrame(list(status_counts), columns=["Status", "Quantidade"])
+
+    # Gráfico interativo com Plotly
+    fig = px.bar(
+        counts_df,
+        x="Status",
+        y="Quantidade",
+        title="Quantidade de Registros por Status",
+        labels={"Status": "Status", "Quantidade": "Quantidade"},
+        color="Status",
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    )
+    fig.update_layout(
+        plot_bgcolor=APPLE_COLORS["background"],
+        paper_bgcolor=APPLE_COLORS["background"],
+        font_color=APPLE_COLORS["text"],
+        title_font_size=20,
+        xaxis_title_font_size=16,
+        yaxis_title_font_size=16,
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def _admin_password_hash() -> bytes:
+    """Hash SHA-256 da senha de administrador, lido dos segredos uma única vez"""
+    return hashlib.sha256(st.secrets["admin_password"].encode()).digest()
+
 class AttendanceSystem:
     """Sistema principal de gestão de presenças"""
     def __init__(self, config: GoogleConfig):
-        self.data_manager = DataManager(config)
-        self.file_handler = FileHandler(config)
-        self.df = self.data_manager.load_data(config.sheet_id)
+        self.data_manager = get_data_manager(config)
+        self.file_handler = get_file_handler(config)
+        self._df: Optional[pd.DataFrame] = None
         apply_apple_design()
 
+    @property
+    def df(self) -> pd.DataFrame:
+        """Planilha carregada só na primeira vez que uma tela precisa dela"""
+        if self._df is None:
+            # Referência ao DataFrame em cache: somente leitura
+            self._df = self.data_manager.load_latest()
+        return self._df
+
+    def _names_index(self):
+        """Nomes normalizados reaproveitados entre reruns da sessão"""
+        token = (self.df.attrs.get("loaded_at"), len(self.df))
+        cached = st.session_state.get("names_lc")
+        if cached is None or cached[0] != token:
+            names_lc, names_set = _normalized_names(token, self.df["Nome"].tolist())
+            cached = (token, names_lc, names_set)
+            st.session_state["names_lc"] = cached
+        return cached
+
     def _show_feedback(self, message: str, type: str = "success"):
         """Exibe mensagens de feedback estilizadas"""
         css_class = "success-message" if type == "success" else "error-message"
         st.markdown(f'<div class="{css_class}">{message}</div>', unsafe_allow_html=True)
 
+    def _flash(self, message: str, celebrate: bool = True):
+        """Agenda uma mensagem de sucesso para ser exibida após o rerun"""
+        st.session_state["flash_message"] = (message, celebrate)
+
+    def _show_flash(self):
+        """Exibe (sem bloquear) a mensagem agendada antes do rerun"""
+        flash = st.session_state.pop("flash_message", None)
+        if flash:
+            message, celebrate = flash
+            st.toast(message)
+            if celebrate:
+                st.balloons()  # Animação de sucesso
+
     def _clear_registration_form(self):
         """Limpa o formulário de cadastro"""
         keys_to_clear = ['name_input', 'phone_input', 'type_input']
@@ -197,44 +577,67 @@ class AttendanceSystem:
             submit_button = st.form_submit_button("Cadastrar", use_container_width=True)
 
             if submit_button:
-                phone_digits = re.sub(r'\D', '', phone)
+                phone_digits = _NON_DIGIT_RE.sub('', phone)
                 if not all([name, phone_digits]):
                     self._show_feedback("❌ Preencha todos os campos obrigatórios", "error")
                     return
                 if len(phone_digits) != 11:
                     self._show_feedback("❌ Número de celular inválido", "error")
                     return
-                if name.lower() in self.df["Nome"].str.lower().values:
+                _, _, names_set = self._names_index()
+                if normalize_name(name) in names_set:
                     self._show_feedback("❌ Nome já cadastrado", "error")
                     return
 
-                new_entry = pd.DataFrame([[
-                    name.strip(),
-                    phone_digits,
-                    participant_type,
-                    "Pagamento Pendente"
-                ]], columns=self.df.columns)
-                self.df = pd.concat([self.df, new_entry], ignore_index=True)
-                if self.data_manager.save_data(self.df):
-                    self._show_feedback("✅ Cadastro realizado com sucesso!")
+                row = [name.strip(), phone_digits, participant_type, "Pagamento Pendente"]
+                if self.data_manager.append_row(row):
                     self._clear_registration_form()
-                    st.balloons()  # Animação de sucesso
-                    time.sleep(1)
+                    self._flash("✅ Cadastro realizado com sucesso!")
                     st.rerun()
 
+    def _confirm_payment(self, uploaded_file, name: str, row_index: int):
+        """Envia o comprovante e atualiza o status na planilha simultaneamente"""
+        # Executor próprio da confirmação: sessões simultâneas não disputam workers
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="abacaxi-io") as executor:
+            upload = executor.submit(
+                _with_script_ctx(self.file_handler.upload_file), uploaded_file, name
+            )
+            status = executor.submit(
+                _with_script_ctx(self.data_manager.update_status), row_index, "Pagamento Em Análise"
+            )
+            return upload.result(), status.result()
+
+    @st.fragment
     def _attendance_confirmation(self):
-        """Gerencia a confirmação de presença"""
+        """Gerencia a confirmação de presença.
+
+        Executado como fragmento: digitar na busca ou trocar a seleção reexecuta
+        apenas esta seção, não o script inteiro.
+        """
+        # Reexecuções do fragmento reaproveitam esta instância: descarta o
+        # DataFrame da última execução completa para ler a versão atual
+        self._df = None
         st.title("🎉 Confirmação de Presença")
         search_term = st.text_input(
             "Buscar participante",
             placeholder="Digite seu nome completo",
             key="search_input"
         ).strip()
-        if search_term:
-            results = self.df[self.df["Nome"].str.contains(search_term, case=False, regex=False)]
-            if not results.empty:
-                selected = st.selectbox("Selecione seu nome", results["Nome"])
-                current_status = self.df.loc[self.df["Nome"] == selected, "Status"].values[0]
+        # Uma única letra casaria com quase todos os nomes: aguarda mais caracteres
+        if len(search_term) >= SEARCH_MIN_LENGTH:
+            data_token, names_lc, _ = self._names_index()
+            hits = _search_names(data_token, normalize_name(search_term), names_lc).tolist()
+            if hits:
+                # As opções são posições de linha: status e nome saem por acesso direto
+                name_col = self.df.columns.get_loc("Nome")
+                status_col = self.df.columns.get_loc("Status")
+                row_index = st.selectbox(
+                    "Selecione seu nome",
+                    hits,
+                    format_func=lambda i: self.df.iat[i, name_col]
+                )
+                selected = self.df.iat[row_index, name_col]
+                current_status = self.df.iat[row_index, status_col]
                 if current_status != "Pagamento Pendente":
                     self._show_feedback("✅ Você já enviou seu comprovante!", "success")
                     return
@@ -251,14 +654,15 @@ class AttendanceSystem:
                     if submit_button:
                         if uploaded_file:
                             with st.spinner("Processando..."):
-                                filename = self.file_handler.upload_file(uploaded_file, selected)
-                                if filename:
-                                    self.df.loc[self.df["Nome"] == selected, "Status"] = "Pagamento Em Análise"
-                                    if self.data_manager.save_data(self.df):
-                                        self._show_feedback("✅ Comprovante enviado com sucesso!")
-                                        st.balloons()  # Animação de sucesso
-                                        time.sleep(1)
-                                        st.rerun()
+                                filename, status_saved = self._confirm_payment(
+                                    uploaded_file, selected, row_index
+                                )
+                                if status_saved and not filename:
+                                    # Upload falhou: desfaz a alteração de status
+                                    self.data_manager.update_status(row_index, "Pagamento Pendente")
+                                elif filename and status_saved:
+                                    self._flash("✅ Comprovante enviado com sucesso!")
+                                    st.rerun()
                         else:
                             self._show_feedback("❌ Por favor, selecione um arquivo", "error")
             else:
@@ -269,10 +673,11 @@ class AttendanceSystem:
         st.subheader("🔒 Acesso Restrito")
         password = st.text_input("Digite a senha de administrador:", type="password")
         if st.button("Entrar"):
-            if password == st.secrets["admin_password"]:
+            password_hash = hashlib.sha256(password.encode()).digest()
+            # Comparação em tempo constante contra o hash calculado uma vez por processo
+            if hmac.compare_digest(password_hash, _admin_password_hash()):
                 st.session_state.authenticated = True
-                st.success("✅ Acesso autorizado!")
-                time.sleep(1)
+                self._flash("✅ Acesso autorizado!", celebrate=False)
                 st.rerun()
             else:
                 self._show_feedback("❌ Senha incorreta. Tente novamente.", "error")
@@ -282,31 +687,16 @@ class AttendanceSystem:
         st.subheader("📊 Painel de Administração")
         
         # Contagem de registros únicos por status
-        status_counts = self.df["Status"].value_counts().reset_index()
-        status_counts.columns = ["Status", "Quantidade"]
-
-        # Gráfico interativo com Plotly
-        fig = px.bar(
-            status_counts,
-            x="Status",
-            y="Quantidade",
-            title="Quantidade de Registros por Status",
-            labels={"Status": "Status", "Quantidade": "Quantidade"},
-            color="Status",
-            color_discrete_sequence=px.colors.qualitative.Pastel,
-        )
-        fig.update_layout(
-            plot_bgcolor=APPLE_COLORS["background"],
-            paper_bgcolor=APPLE_COLORS["background"],
-            font_color=APPLE_COLORS["text"],
-            title_font_size=20,
-            xaxis_title_font_size=16,
-            yaxis_title_font_size=16,
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        status_counts = tuple(self.df["Status"].value_counts().items())
+        st.plotly_chart(build_status_chart(status_counts), use_container_width=True)
 
-        # Exibir todos os dados em uma tabela
-        st.dataframe(self.df)
+        # Tabela paginada: só a página atual é serializada e enviada ao navegador
+        total = len(self.df)
+        pages = max(1, -(-total // ADMIN_PAGE_SIZE))
+        page = st.number_input("Página", min_value=1, max_value=pages, value=1, step=1)
+        start = (page - 1) * ADMIN_PAGE_SIZE
+        st.dataframe(self.df.iloc[start:start + ADMIN_PAGE_SIZE], use_container_width=True)
+        st.caption(f"{total} registros · página {page} de {pages}")
 
     def run(self):
         """Executa o sistema principal"""
@@ -315,6 +705,7 @@ class AttendanceSystem:
             "Navegue pelas opções:",
             ["Confirmação de Presença", "Novo Cadastro", "Painel de Administração"]
         )
+        self._show_flash()
 
         if page == "Confirmação de Presença":
             self._attendance_confirmation()
@@ -326,13 +717,28 @@ class AttendanceSystem:
             else:
                 self._admin_dashboard()
 
-def main():
-    """Função principal"""
-    config = GoogleConfig(
+@st.cache_resource(show_spinner=False)
+def load_config() -> GoogleConfig:
+    """Lê a configuração dos segredos uma única vez por processo"""
+    return GoogleConfig(
         sheet_id=st.secrets["gdrive"]["GOOGLE_SHEET_ID"],
         folder_id=st.secrets["gdrive"]["GDRIVE_FOLDER_ID"],
         credentials=st.secrets["gdrive_credentials"]
     )
+
+@st.cache_resource(show_spinner=False)
+def get_data_manager(_config: GoogleConfig) -> DataManager:
+    """DataManager compartilhado entre reruns e sessões"""
+    return DataManager(_config)
+
+@st.cache_resource(show_spinner=False)
+def get_file_handler(_config: GoogleConfig) -> FileHandler:
+    """FileHandler compartilhado entre reruns e sessões"""
+    return FileHandler(_config)
+
+def main():
+    """Função principal"""
+    config = load_config()
     system = AttendanceSystem(config)
     system.run()
 